@@ -0,0 +1,90 @@
+"""
+File: _pong_kernels_py.py
+
+The physics kernel that applies the rules of the game every
+frame, written as plain Python so it runs without numba.
+build_kernels.py compiles step() from here ahead of time into the
+pong_kernels module, and pong.py falls back to this one (compiled
+at start up when numba is installed) when that is missing or
+was built from an older version of this file or the rules.
+"""
+import zlib
+
+# The rules of the game step() applies
+from pong_rules import (SCREEN_WIDTH_Q, SCREEN_HEIGHT_Q, BALL_RADIUS_Q,
+                        MOVE_AMOUNT_Q, SCORE_HIT, SCORE_MISS,
+                        TOO_CLOSE_X_Q, TOO_CLOSE_Y_Q, PADDLE_X_Q,
+                        MIN_Y_Q, MAX_Y_Q)
+import pong_rules
+
+# The types step() is compiled for, ahead of time or at start up
+STEP_SIGNATURE = "void(i4[:, :], i4[:], b1[:], i8[:], i4[:, :], i8[:])"
+
+# Changes whenever this file or the rules do, so pong.py can tell
+# when a pong_kernels build no longer matches step() or its constants
+STEP_VERSION = 0
+for _path in (__file__, pong_rules.__file__):
+    with open(_path, 'rb') as _source:
+        STEP_VERSION = zlib.crc32(_source.read(), STEP_VERSION)
+
+def step(balls, paddle, holding, score, rng_buf, rng_pos):
+    """
+    Moves the paddle for the held keys, then moves every ball
+    forward one frame and checks it against the paddle and the
+    borders of the screen. Only arrays are passed in and all of
+    them are updated in place, so numba can compile the whole
+    frame down to plain integer arithmetic, either ahead of time
+    or at start up.
+    :param balls: The fixed point [x, y, dx, dy] rows of every ball
+    :param paddle: The fixed point [x, y] center of the paddle
+    :param holding: Whether the down and up keys are held
+    :param score: One element array holding the score
+    :param rng_buf: The [y, dx, dy] serves to restart balls with
+    :param rng_pos: One element array holding the next serve to use
+    """
+    # Move the paddle for the keys being held.
+    # No moving paddle out of screen please.
+    paddle_y = paddle[1]
+    if holding[0]:
+        paddle_y = max(paddle_y - MOVE_AMOUNT_Q, MIN_Y_Q)
+    if holding[1]:
+        paddle_y = min(paddle_y + MOVE_AMOUNT_Q, MAX_Y_Q)
+    paddle[1] = paddle_y
+
+    # Each ball is loaded once, moved, checked against everything
+    # and stored back, all in a single pass over the balls. The hit
+    # and bounce checks are written without branches: each condition
+    # is a 0/1 flag, and multiplying by 1 - 2 * flag flips the
+    # velocity only when the flag is set.
+    misses = 0
+    hits = 0
+    for i in range(balls.shape[0]):
+        # Move the ball forward one element in time
+        dx, dy = balls[i, 2], balls[i, 3]
+        bx, by = balls[i, 0] + dx, balls[i, 1] + dy
+
+        # check for the ball going past the paddle
+        if bx > SCREEN_WIDTH_Q:
+            # We missed!
+            misses += 1
+            j = rng_pos[0]
+            rng_pos[0] += 1
+            bx, by, dx, dy = 0, rng_buf[j, 0], rng_buf[j, 1], rng_buf[j, 2]
+
+        # too close to the paddle and moving right, this is a hit!
+        hit = ((abs(bx - PADDLE_X_Q) < TOO_CLOSE_X_Q) &
+               (abs(by - paddle_y) < TOO_CLOSE_Y_Q) &
+               (dx > 0))
+        dx *= 1 - 2 * hit
+        hits += hit
+
+        # check for the ball hitting the borders of the screen
+        dx *= 1 - 2 * ((bx - BALL_RADIUS_Q < 0) & (dx < 0))
+        dy *= 1 - 2 * ((by - BALL_RADIUS_Q < 0) & (dy < 0))
+        dy *= 1 - 2 * ((by + BALL_RADIUS_Q > SCREEN_HEIGHT_Q) & (dy > 0))
+
+        balls[i, 0], balls[i, 1], balls[i, 2], balls[i, 3] = bx, by, dx, dy
+
+    # misses count before hits, as when they were checked one after
+    # the other. No negative scores please.
+    score[0] = max(score[0] - SCORE_MISS * misses, 0) + SCORE_HIT * hits
@@ -0,0 +1,28 @@
+"""
+File: build_kernels.py
+
+Compiles the physics kernel in _pong_kernels_py.py ahead of time
+into the pong_kernels extension module, so pong.py can load it
+without numba having to compile anything when the game starts.
+
+Needs numba installed. Run it again whenever _pong_kernels_py.py
+or pong_rules.py changes; until then pong.py sees the build is
+out of date and falls back to compiling step() at start up:
+    python build_kernels.py
+"""
+from numba.pycc import CC
+
+import _pong_kernels_py
+
+STEP_VERSION = _pong_kernels_py.STEP_VERSION
+
+cc = CC('pong_kernels')
+cc.export('step', _pong_kernels_py.STEP_SIGNATURE)(_pong_kernels_py.step)
+
+@cc.export('version', 'i8()')
+def version():
+    """ Which version of _pong_kernels_py.py this was built from """
+    return STEP_VERSION
+
+if __name__ == "__main__":
+    cc.compile()
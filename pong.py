@@ -9,108 +9,156 @@ This program implements a simplistic version of the
 classic Pong arcade game.
 """
 import arcade
-import random
+import numpy as np
+
+# The rules of the game, shared with the physics kernel
+from pong_rules import (SCREEN_WIDTH, SCREEN_HEIGHT, BALL_RADIUS,
+                        PADDLE_WIDTH, PADDLE_HEIGHT,
+                        FIXED_SHIFT, FIXED_ONE, SCREEN_HEIGHT_Q, PADDLE_X_Q)
+from _pong_kernels_py import STEP_SIGNATURE, STEP_VERSION
+
+try:
+    # built ahead of time by build_kernels.py
+    import pong_kernels
+except ImportError:
+    pong_kernels = None
+
+# a build without a matching version is ignored
+_built_version = getattr(pong_kernels, "version", None)
+if _built_version is not None and _built_version() == STEP_VERSION:
+    step = pong_kernels.step
+else:
+    # not built, or built from an older step() that no longer matches
+    from _pong_kernels_py import step
+    try:
+        from numba import njit
+    except ImportError:
+        # numba is optional, without it the physics just runs as plain Python
+        pass
+    else:
+        # not cached to disk: numba only checks _pong_kernels_py.py for
+        # changes, so a cached build would keep using old pong_rules
+        # constants. build_kernels.py is the way to skip compiling.
+        step = njit(STEP_SIGNATURE)(step)
+
+FRAME_RATE = 1 / 60
+
+# Serves are drawn 1024 [y, dx, dy] rows at a time rather than
+# one random number at a time
+_RNG = np.random.default_rng()
+_RNG_LOW = np.array([0, 3 * FIXED_ONE, 3 * FIXED_ONE], dtype=np.float64)
+_RNG_SPAN = np.array([SCREEN_HEIGHT_Q, 2 * FIXED_ONE, 2 * FIXED_ONE], dtype=np.float64)
+_RNG_BUF = np.empty((1024, 3), dtype=np.int32)
+# unit randoms are drawn here, then scaled into _RNG_BUF
+_RNG_SCRATCH = np.empty(_RNG_BUF.shape, dtype=np.float64)
+# starts out used up, so the first serve fills the buffer
+_RNG_POS = np.array([len(_RNG_BUF)], dtype=np.int64)
 
-# These are Global constants to use throughout the game
-SCREEN_WIDTH = 400
-SCREEN_HEIGHT = 300
-BALL_RADIUS = 10
-
-PADDLE_WIDTH = 10
-PADDLE_HEIGHT = 50
-MOVE_AMOUNT = 5
-
-SCORE_HIT = 1
-SCORE_MISS = 5
-
-
-class Point():
-    """ This class handles the positions of the game objects (ball & padddle) """
-    def __init__(self):
-        self.x = 0
-        self.y = 0
-
-class Velocity():
-    """ This class handles the velocity of the game objects (ball & padddle) """
-    def __init__(self):
-        self.dx = 1
-        self.dy = 1
 
 class Paddle():
-    """ This class handles how the paddle is created and how it moves """
+    """ This class handles how the paddle is created, step() moves it """
+    __slots__ = ('center', 'sprite')
+
     def __init__(self):
-        self.center = Point()
-        self.center.x = SCREEN_WIDTH - PADDLE_WIDTH
-        self.center.y = SCREEN_HEIGHT * 0.5
+        # center is kept as a single fixed point [x, y] array rather than a Point
+        self.center = np.array([PADDLE_X_Q, SCREEN_HEIGHT_Q // 2], dtype=np.int32)
 
-    def draw(self):
-        arcade.draw_rectangle_filled(self.center.x, self.center.y, PADDLE_WIDTH, PADDLE_HEIGHT, arcade.color.AFRICAN_VIOLET)
+        # drawn as a sprite so its quad is only built once
+        self.sprite = arcade.SpriteSolidColor(PADDLE_WIDTH, PADDLE_HEIGHT, arcade.color.AFRICAN_VIOLET)
+        self.sprite.center_x = self.x
+        self.sprite.center_y = self.y
 
-    def move_up(self):
-        self.center.y += 5
+    @property
+    def x(self):
+        return int(self.center[0]) >> FIXED_SHIFT
 
-    def move_down(self):
-        self.center.y -= 5
+    @property
+    def y(self):
+        return int(self.center[1]) >> FIXED_SHIFT
 
-class Ball():
-    """ This class handles how the ball is created and how it moves """
-    def __init__(self):
-        self.center = Point()
-        self.velocity = Velocity()
-        self.center.x = 0
-        self.center.y = random.uniform(0, SCREEN_HEIGHT)
-        self.velocity.dx = random.uniform(3, 5)
-        self.velocity.dy = random.uniform(3, 5)
-
-    def draw(self):
-        arcade.draw_circle_filled(self.center.x, self.center.y, BALL_RADIUS, arcade.color.BLACK)
-
-    def advance(self):
-        self.center.x += self.velocity.dx
-        self.center.y += self.velocity.dy
-        
-    def bounce_horizontal(self):
-        self.velocity.dx = self.velocity.dx * -1
-
-    def bounce_vertical(self):
-        self.velocity.dy = self.velocity.dy * -1
-
-    def restart(self):
-        self.center.x = 0
-        self.center.y = random.uniform(0, SCREEN_HEIGHT)
-        self.velocity.dx = random.uniform(3, 5)
-        self.velocity.dy = random.uniform(3, 5)
+def _reserve_rng(count):
+    """
+    Makes sure at least count serves are left in the buffer,
+    refilling all of it in one call when they are not.
+    """
+    if _RNG_POS[0] + count > len(_RNG_BUF):
+        # low + span * random(), all in place; rounding down to int32
+        # keeps every serve in [low, low + span)
+        _RNG.random(out=_RNG_SCRATCH)
+        np.multiply(_RNG_SCRATCH, _RNG_SPAN, out=_RNG_SCRATCH)
+        np.add(_RNG_SCRATCH, _RNG_LOW, out=_RNG_BUF, casting='unsafe')
+        _RNG_POS[0] = 0
+
+def _next_rng(count):
+    """ Takes the next count [y, dx, dy] serves from the buffer """
+    _reserve_rng(count)
+    start = _RNG_POS[0]
+    _RNG_POS[0] += count
+    return _RNG_BUF[start:start + count]
+
+def new_balls(count):
+    """ Returns the fixed point [x, y, dx, dy] rows of freshly served balls """
+    balls = np.zeros((count, 4), dtype=np.int32)
+    balls[:, 1:4] = _next_rng(count)
+    return balls
 
 class Pong(arcade.Window):
     """
     This class handles all the game callbacks and interaction
-    It assumes the following classes exist:
-        Point
-        Velocity
-        Ball
-        Paddle
-    This class will then call the appropriate functions of
-    each of the above classes.
+    It assumes the Paddle class exists, and keeps every
+    ball as one fixed point [x, y, dx, dy] row of the balls
+    array so step() can move and check them all at once.
     You are welcome to modify anything in this class,
     but should not have to if you don't want to.
     """
 
+    # Which slot of _holding each arrow key sets:
+    # 0 moves the paddle down, 1 moves it up
+    _KEY_TO_DIR = {
+        arcade.key.LEFT: 0,
+        arcade.key.DOWN: 0,
+        arcade.key.RIGHT: 1,
+        arcade.key.UP: 1,
+    }
+
     def __init__(self, width, height):
         """
         Sets up the initial conditions of the game
         :param width: Screen width
         :param height: Screen height
         """
-        super().__init__(width, height)
+        # update and draw at a steady 60 frames a second
+        # rather than as fast as the event loop allows
+        super().__init__(width, height, update_rate=FRAME_RATE)
+        if hasattr(self, "set_draw_rate"):
+            self.set_draw_rate(FRAME_RATE)
 
-        self.ball = Ball()
+        self.balls = new_balls(1)
         self.paddle = Paddle()
-        self.score = 0
+
+        # everything is drawn as one batch of sprites rather than
+        # one shape at a time
+        self.sprites = arcade.SpriteList()
+        self.sprites.append(self.paddle.sprite)
+        self.ball_sprites = []
+        self.add_ball_sprite()
+        self.sync_ball_sprites()
+
+        # kept in an array so step() can update it in place
+        self._score = np.zeros(1, dtype=np.int64)
+
+        # the score text is only laid out again when the score changes
+        self._score_text = arcade.Text("Score: 0", 10, SCREEN_HEIGHT - 20, arcade.color.NAVY_BLUE, 12)
+        self._last_score = 0
+
+        # updates counted over the last second, to check the frame rate
+        self._fps_text = arcade.Text("FPS: 0", SCREEN_WIDTH - 60, SCREEN_HEIGHT - 20, arcade.color.NAVY_BLUE, 12)
+        self._fps_time = 0.0
+        self._fps_frames = 0
 
         # These are used to see if the user is
         # holding down the arrow keys
-        self.holding_left = False
-        self.holding_right = False
+        self._holding = np.zeros(2, dtype=np.bool_)
 
         arcade.set_background_color(arcade.color.WHITE)
 
@@ -124,97 +172,66 @@ class Pong(arcade.Window):
         arcade.start_render()
 
         # draw each object
-        self.ball.draw()
-
-        self.paddle.draw()
+        self.sprites.draw()
 
         self.draw_score()
+        self._fps_text.draw()
 
     def draw_score(self):
         """
         Puts the current score on the screen
         """
-        score_text = "Score: {}".format(self.score)
-        start_x = 10
-        start_y = SCREEN_HEIGHT - 20
-        arcade.draw_text(score_text, start_x=start_x, start_y=start_y, font_size=12, color=arcade.color.NAVY_BLUE)
+        if self.score != self._last_score:
+            self._last_score = self.score
+            self._score_text.text = "Score: {}".format(self._last_score)
+        self._score_text.draw()
+
+    @property
+    def score(self):
+        return int(self._score[0])
 
     def update(self, delta_time):
         """
         Update each object in the game.
         :param delta_time: tells us how much time has actually elapsed
         """
+        self.count_fps(delta_time)
 
-        # Move the ball forward one element in time
-        self.ball.advance()
-
-        # Check to see if keys are being held, and then
-        # take appropriate action
-        self.check_keys()
+        # Move the paddle for the held keys, then move the balls
+        # and check them at important places. At most one serve
+        # per ball is needed this frame.
+        _reserve_rng(len(self.balls))
+        step(self.balls, self.paddle.center, self._holding, self._score, _RNG_BUF, _RNG_POS)
+        self.paddle.sprite.center_y = self.paddle.y
+        self.sync_ball_sprites()
 
-        # check for ball at important places
-        self.check_miss()
-        self.check_hit()
-        self.check_bounce()
-
-    def check_hit(self):
-        """
-        Checks to see if the ball has hit the paddle
-        and if so, calls its bounce method.
-        :return:
-        """
-        too_close_x = (PADDLE_WIDTH / 2) + BALL_RADIUS
-        too_close_y = (PADDLE_HEIGHT / 2) + BALL_RADIUS
-
-        if (abs(self.ball.center.x - self.paddle.center.x) < too_close_x and
-                    abs(self.ball.center.y - self.paddle.center.y) < too_close_y and
-                    self.ball.velocity.dx > 0):
-            # we are too close and moving right, this is a hit!
-            self.ball.bounce_horizontal()
-            self.score += SCORE_HIT
-
-    def check_miss(self):
+    def count_fps(self, delta_time):
         """
-        Checks to see if the ball went past the paddle
-        and if so, restarts it.
+        Shows how many updates ran over the last second.
+        :param delta_time: tells us how much time has actually elapsed
         """
-        if self.ball.center.x > SCREEN_WIDTH:
-            # We missed!
-            if self.score >= 5:
-                self.score -= SCORE_MISS
-            # no negative scores please.
-            else: 
-                self.score = 0
-
-            self.ball.restart()
-
-    def check_bounce(self):
+        self._fps_time += delta_time
+        self._fps_frames += 1
+        if self._fps_time >= 1:
+            self._fps_text.text = "FPS: {}".format(round(self._fps_frames / self._fps_time))
+            self._fps_time = 0.0
+            self._fps_frames = 0
+
+    def add_ball_sprite(self):
         """
-        Checks to see if the ball has hit the borders
-        of the screen and if so, calls its bounce methods.
+        Adds the sprite for one more ball.
         """
-        if self.ball.center.x - BALL_RADIUS < 0 and self.ball.velocity.dx < 0:
-            self.ball.bounce_horizontal()
-
-        if self.ball.center.y - BALL_RADIUS < 0 and self.ball.velocity.dy < 0:
-            self.ball.bounce_vertical()
+        sprite = arcade.SpriteCircle(BALL_RADIUS, arcade.color.BLACK)
+        self.ball_sprites.append(sprite)
+        self.sprites.append(sprite)
 
-        if self.ball.center.y + BALL_RADIUS > SCREEN_HEIGHT and self.ball.velocity.dy > 0:
-            self.ball.bounce_vertical()
-
-    def check_keys(self):
+    def sync_ball_sprites(self):
         """
-        Checks to see if the user is holding down an
-        arrow key, and if so, takes appropriate action.
+        Moves each ball sprite to where its ball now is.
         """
-
-        # no moving paddle out of screen please.
-        if self.holding_left and (self.paddle.center.y - PADDLE_HEIGHT * 0.5) >= 0:
-            self.paddle.move_down()
-
-        # no moving paddle out of screen please.
-        if self.holding_right and (self.paddle.center.y + PADDLE_HEIGHT * 0.5) < SCREEN_HEIGHT:
-            self.paddle.move_up()
+        for sprite, (x, y) in zip(self.ball_sprites, (self.balls[:, 0:2] >> FIXED_SHIFT).tolist()):
+            sprite.center_x = x
+            sprite.center_y = y
 
     def on_key_press(self, key, key_modifiers):
         """
@@ -223,11 +240,9 @@ class Pong(arcade.Window):
         :param key: The key that was pressed
         :param key_modifiers: Things like shift, ctrl, etc
         """
-        if key == arcade.key.LEFT or key == arcade.key.DOWN:
-            self.holding_left = True
-
-        if key == arcade.key.RIGHT or key == arcade.key.UP:
-            self.holding_right = True
+        direction = self._KEY_TO_DIR.get(key)
+        if direction is not None:
+            self._holding[direction] = True
 
     def on_key_release(self, key, key_modifiers):
         """
@@ -236,24 +251,21 @@ class Pong(arcade.Window):
         :param key: The key that was pressed
         :param key_modifiers: Things like shift, ctrl, etc
         """
-        if key == arcade.key.LEFT or key == arcade.key.DOWN:
-            self.holding_left = False
-
-        if key == arcade.key.RIGHT or key == arcade.key.UP:
-            self.holding_right = False
+        direction = self._KEY_TO_DIR.get(key)
+        if direction is not None:
+            self._holding[direction] = False
 
-    """
-    This is for adding another once a certain score is reached.
-    However I'm running out of time and it looks like doing it properly
-    will take quite some time. So this is left here for a future update
-    
     def multiply(self):
-        self.ball2 = Ball()
-        self.ball2.center.x = self.ball.center.x
-        self.ball2.center.y = self.ball.center.y
-        self.ball2.velocity.dy = random.uniform(-3, 3)
-        self.ball2.velocity.dx = self.ball.velocity.dx
-    """
+        """
+        Adds another ball, split off from the first one at a
+        different angle. Meant for once a certain score is
+        reached, but not hooked up to the scoring yet.
+        """
+        ball2 = self.balls[0:1].copy()
+        ball2[0, 3] = _RNG.integers(-3 * FIXED_ONE, 3 * FIXED_ONE)
+        self.balls = np.vstack((self.balls, ball2))
+        self.add_ball_sprite()
+        self.sync_ball_sprites()
 
 # Creates the game and starts it going
 window = Pong(SCREEN_WIDTH, SCREEN_HEIGHT)
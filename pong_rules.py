@@ -0,0 +1,38 @@
+"""
+File: pong_rules.py
+
+The rules of the game: sizes, speeds and scores, shared by
+pong.py and the physics kernel in _pong_kernels_py.py.
+"""
+
+# These are Global constants to use throughout the game
+SCREEN_WIDTH = 400
+SCREEN_HEIGHT = 300
+BALL_RADIUS = 10
+
+PADDLE_WIDTH = 10
+PADDLE_HEIGHT = 50
+MOVE_AMOUNT = 5
+
+SCORE_HIT = 1
+SCORE_MISS = 5
+
+# Positions and velocities are kept in fixed point: pixels times
+# 256, as int32, so moving is an exact integer add. Shifting right
+# by FIXED_SHIFT turns one back into whole pixels for drawing.
+FIXED_SHIFT = 8
+FIXED_ONE = 1 << FIXED_SHIFT
+
+SCREEN_WIDTH_Q = SCREEN_WIDTH * FIXED_ONE
+SCREEN_HEIGHT_Q = SCREEN_HEIGHT * FIXED_ONE
+BALL_RADIUS_Q = BALL_RADIUS * FIXED_ONE
+MOVE_AMOUNT_Q = MOVE_AMOUNT * FIXED_ONE
+
+# How close a ball can get to the paddle before it is a hit
+TOO_CLOSE_X_Q = int(((PADDLE_WIDTH / 2) + BALL_RADIUS) * FIXED_ONE)
+TOO_CLOSE_Y_Q = int(((PADDLE_HEIGHT / 2) + BALL_RADIUS) * FIXED_ONE)
+PADDLE_X_Q = (SCREEN_WIDTH - PADDLE_WIDTH) * FIXED_ONE
+
+# How far the paddle can move without leaving the screen
+MIN_Y_Q = int(PADDLE_HEIGHT * 0.5 * FIXED_ONE)
+MAX_Y_Q = SCREEN_HEIGHT_Q - MIN_Y_Q